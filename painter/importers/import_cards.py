@@ -1,16 +1,30 @@
+import itertools
+import os
 import re
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
 from openpyxl import load_workbook
 
+from painter import profiling
 from painter.models import Card
+from painter.projection import FieldProjector
+from painter.repository import get_card_store
+from .layout import compile_layout
 
 
 class Command(BaseCommand):
     help = ('Clears the database of cards, then fills it with the contents of one or' +
             ' more specified XLSX files.')
 
+    # The number of cards held in memory and written to the database at once.
+    # Can be overridden with the IP_IMPORT_CHUNK_SIZE setting.
+    chunk_size = 500
+
+    # An optional layout of named tables on each sheet - see layout.py.
+    # If this is None, the IP_SHEET_LAYOUT setting is used instead.
+    layout = None
+
     def add_arguments(self, parser):
         parser.add_argument(
             'filenames',
@@ -18,6 +32,12 @@ class Command(BaseCommand):
             type=str,
             help='One or more XLSX file names. The extension is optional.',
         )
+        parser.add_argument(
+            '--profile',
+            action='store_true',
+            help=('Profile the import, save a pstats dump' +
+                  ' and print the hottest functions.'),
+        )
 
     def ensure_extension(self, filename, extension):
         """Tag a filename with a given file format if it doesn't have one already."""
@@ -28,13 +48,21 @@ class Command(BaseCommand):
 
     def load_all_worksheets(self, filenames, verbosity=0):
         """
-        Open a given series of Excel files and return all their worksheets.
+        Open a given series of Excel files and yield all their worksheets.
 
         Ignore worksheets whose names start with an @ symbol - these are
         used as metadata.
-        """
-        all_sheets = []
 
+        Workbooks are opened in read-only mode, one at a time, as they're needed.
+        Read-only worksheets load their rows lazily, as they're iterated over, so
+        only the rows currently being parsed are held in memory. Each workbook is
+        closed once all of its sheets have been used.
+
+        Read-only mode normally trusts the size each sheet says it is, but some
+        programs that write XLSX files get it wrong, which would silently cut off
+        rows and columns. So each sheet's size is reset, and its rows are read for
+        as long as there are any; they can then stop at their last non-empty cell.
+        """
         for filename in filenames:
             filename = self.ensure_extension(filename, 'xlsx')
             if verbosity:
@@ -42,21 +70,25 @@ class Command(BaseCommand):
 
             workbook = load_workbook(
                 filename=filename,
-                # read_only=True,  # read_only mode causes sharing violations...
+                read_only=True,  # Stream rows from the file instead of loading them all
                 data_only=True,  # Load the values computed by formulae, not the formulae
                 keep_vba=False,  # Throw away any VBA scripting
             )
 
-            valid_sheets = [w for w in workbook.worksheets if w.title[0] != '@']
-
-            all_sheets += valid_sheets
+            try:
+                valid_sheets = [w for w in workbook.worksheets if w.title[0] != '@']
+                for sheet in valid_sheets:
+                    sheet.reset_dimensions()
 
-        if verbosity:
-            titles = [w.title for w in all_sheets]
-            titles = ', '.join(titles)
-            print('Loading worksheets: {}'.format(titles))
+                if verbosity:
+                    titles = [w.title for w in valid_sheets]
+                    titles = ', '.join(titles)
+                    print('Loading worksheets: {}'.format(titles))
 
-        return all_sheets
+                yield from valid_sheets
+            finally:
+                # Release the file handle, so the file can be saved again.
+                workbook.close()
 
     def make_safe_name(self, value):
         """
@@ -130,7 +162,9 @@ class Command(BaseCommand):
         for i, header_data in enumerate(headers):
             key = header_data[0]
             is_list = header_data[1]
-            value = worksheet_row[start_column + i].value
+            # Rows in read-only worksheets can stop at their last non-empty cell.
+            column = start_column + i
+            value = worksheet_row[column].value if column < len(worksheet_row) else None
 
             # Convert to string to ensure zeros are displayed correctly,
             # and that calling split() doesn't explode.
@@ -186,33 +220,69 @@ class Command(BaseCommand):
 
         return nonempty_rows
 
+    def get_layout_extractor(self):
+        """Return a compiled extractor for this importer's layout, or None."""
+        if not hasattr(self, '_layout_extractor'):
+            # An importer's own layout wins, since its code relies on that layout.
+            layout = self.layout
+            if layout is None:
+                layout = getattr(settings, 'IP_SHEET_LAYOUT', None)
+            self._layout_extractor = layout and compile_layout(layout)
+        return self._layout_extractor
+
+    def extract_regions(self, worksheet):
+        """
+        Parse every table in the layout from a worksheet, in one pass over its rows.
+
+        Return a dictionary of region names to lists of row dictionaries.
+        """
+        return self.get_layout_extractor().extract(
+            worksheet.iter_rows(), self.parse_header_row, self.parse_data_row)
+
     def convert_to_python(self, worksheet):
         """
-        Turn an openpyxl worksheet into a list of dictionaries.
+        Turn an openpyxl worksheet into an iterable of dictionaries.
 
         Each dictionary represents one card or group of cards that collectively
         form a single game 'entity'. This could be one spell, one attack, a series
         of stat cards for a single unit, and so on.
 
         The base implementation treats the first row as the headers of a table,
-        and all the other rows as entries.
+        and all the other rows as entries. Rows are parsed one at a time, as they're
+        read from the sheet, rather than all being collected up front.
 
         If the worksheet is empty - such as the extra default sheets in an Excel
-        file - or only contains a header row, return an empty list.
+        file - or only contains a header row, nothing is yielded.
+
+        If a layout is set, each region is treated as a table of cards instead,
+        and their entries are yielded in the order the layout lists them.
         """
-        all_rows = list(worksheet.rows)
+        if self.get_layout_extractor():
+            for table in self.extract_regions(worksheet).values():
+                yield from table
+            return
 
-        if len(all_rows) < 2:
-            return []
+        # Read-only worksheets make .rows up front, from the sheet's original size,
+        # so use iter_rows() to pick up the size reset by load_all_worksheets.
+        rows = worksheet.iter_rows()
+
+        header_row = next(rows, None)
+        if header_row is None:
+            return
 
-        return self.parse_table(all_rows)
+        headers = self.parse_header_row(header_row)
+
+        for data in rows:
+            parsed_row = self.parse_data_row(data, headers)
+            if parsed_row is not None:
+                yield parsed_row
 
     def convert_to_cards(self, card_data):
         """
         Convert a dictionary into one or more Card objects, returned in a list.
 
         The dictionary is intended to represent a single entry - convert_to_python
-        returns a list of such 'entries'. Often, this will be a single card.
+        yields a series of such 'entries'. Often, this will be a single card.
 
         The basic implementation pops 'name', 'template' and 'quantity' out of
         card_data, then creates one Card with the rest of card_data saved in its
@@ -245,39 +315,84 @@ class Command(BaseCommand):
             for template in template_list
         ]
 
+    def iter_card_data(self, worksheets):
+        """Yield every entry from every worksheet, in order."""
+        for sheet in worksheets:
+            yield from self.convert_to_python(sheet)
+
+    def iter_cards(self, card_data):
+        """Yield the Card objects for each entry in card_data, in order."""
+        for entry in card_data:
+            yield from self.convert_to_cards(entry)
+
+    def project_cards(self, cards):
+        """
+        Trim each card's data down to the fields its template uses.
+
+        See painter.projection. Templates are analysed afresh for every import.
+        """
+        projector = FieldProjector()
+        for card in cards:
+            yield projector.project(card)
+
+    def iter_chunks(self, cards):
+        """
+        Group an iterable of cards into lists of at most `chunk_size` cards.
+
+        Only one chunk is held in memory at a time.
+        """
+        chunk_size = getattr(settings, 'IP_IMPORT_CHUNK_SIZE', self.chunk_size)
+        cards = iter(cards)
+
+        while True:
+            chunk = list(itertools.islice(cards, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def announce_chunks(self, chunks):
+        """Chirp triumphantly to stdout as each chunk of cards goes by."""
+        for chunk in chunks:
+            print(', '.join([c.name for c in chunk]))
+            yield chunk
+
     def handle(self, *args, **options):
         """DO ALL THE THINGS"""
         verbosity = options['verbosity']
 
+        if not options.get('profile'):
+            self.import_cards(verbosity)
+            return
+
+        result, profiler = profiling.profile_call(self.import_cards, verbosity)
+        name = profiling.save_profile(profiler, 'import')
+        print(profiling.format_summary(profiling.summarise(profiler, limit=10)))
+        print('\nProfile saved to {}'.format(
+            os.path.join(profiling.get_profile_dir(), name)))
+
+    def import_cards(self, verbosity):
+        """Replace all the cards in the database with the ones in IP_DATA_FILES."""
         # The filenames are defined in a setting.
         filenames = settings.IP_DATA_FILES
         if not filenames:
             return
 
-        # Clear all card data before we go any further.
-        Card.objects.all().delete()
-
-        # Import!
+        # Import! Each stage of the pipeline is a generator, so the whole deck is
+        # never in memory at once - only the chunk currently being written.
+        # The card store clears out the old cards before it stores the new ones.
         worksheets = self.load_all_worksheets(filenames, verbosity)
-        python_data = []
-        for sheet in worksheets:
-            python_data += self.convert_to_python(sheet)
-
-        # Stop right here if we don't have any data.
-        if not python_data:
-            if verbosity:
-                print('No cards were created.')
-            return
-
-        # Create the card objects.
-        cards = []
-        for card_data in python_data:
-            cards += self.convert_to_cards(card_data)
+        card_data = self.iter_card_data(worksheets)
+        cards = self.iter_cards(card_data)
+        if getattr(settings, 'IP_PROJECT_FIELDS', False):
+            cards = self.project_cards(cards)
+        chunks = self.iter_chunks(cards)
+        if verbosity:
+            chunks = self.announce_chunks(chunks)
 
-        # Use bulk_create to store them for an easy performance bump.
-        Card.objects.bulk_create(cards)
+        total = get_card_store().replace(chunks)
 
-        # Chirp triumphantly to stdout.
         if verbosity:
-            print('{} cards created!'.format(len(cards)))
-            print(', '.join([c.name for c in cards]))
+            if total:
+                print('{} cards created!'.format(total))
+            else:
+                print('No cards were created.')
@@ -7,37 +7,32 @@ class Command(BaseImportCommand):
             ' more specified XLSX files. Parses a Laundry character sheet,' +
             ' looking for a specific layout.')
 
+    layout = {
+        'identity': {'start_row': 0, 'height': 2, 'width': 4},
+        'traits': {'start_row': 0, 'start_column': 5, 'height': 2, 'width': 4},
+        'spells': {'start_row': 0, 'start_column': 10, 'height': 5, 'width': 5},
+        'weapons': {'start_row': 6, 'start_column': 10, 'height': 5, 'width': 4},
+        'stats': {'start_row': 3, 'height': 9, 'width': 3},
+        'derived_stats': {'start_row': 3, 'start_column': 4, 'height': 8, 'width': 2},
+        'skills': {'start_row': 15, 'width': 7},
+    }
+
     def convert_to_python(self, worksheet):
         """
         Each worksheet in this file represents a single character.
 
-        The sheet contains several tables, in different locations.
+        The sheet contains several tables, in different locations - see `layout`.
         """
-        all_rows = list(worksheet.rows)
-
-        identity_table = self.parse_table(
-            all_rows, start_row=0, height=2, width=4)
-        traits_table = self.parse_table(
-            all_rows, start_row=0, start_column=5, height=2, width=4)
-        spell_table = self.parse_table(
-            all_rows, start_row=0, start_column=10, height=5, width=5)
-        weapon_table = self.parse_table(
-            all_rows, start_row=6, start_column=10, height=5, width=4)
-        stat_table = self.parse_table(
-            all_rows, start_row=3, height=9, width=3)
-        derived_stat_table = self.parse_table(
-            all_rows, start_row=3, start_column=4, height=8, width=2)
-        skill_table = self.parse_table(
-            all_rows, start_row=15, width=7)
+        tables = self.extract_regions(worksheet)
 
         # Both the identity and traits tables only have a single row.
-        identity = identity_table[0]
-        traits = traits_table[0]
+        identity = tables['identity'][0]
+        traits = tables['traits'][0]
 
         # Arrange derived stats by their keys, so they can be more organised.
         derived_stats = {
             self.make_safe_name(row['derived_stat']): row
-            for row in derived_stat_table
+            for row in tables['derived_stats']
         }
 
         # Damage bonuses are converted to dice, using a table.
@@ -76,7 +71,7 @@ class Command(BaseImportCommand):
         skills = []
         parent_skill_name = None
 
-        for skill_row in skill_table:
+        for skill_row in tables['skills']:
             # Grab the name of the skill, since we'll need it.
             name = skill_row['skill']
 
@@ -114,11 +109,11 @@ class Command(BaseImportCommand):
         character = {
             **identity,
             **traits,
-            'stats': stat_table,
+            'stats': tables['stats'],
             'derived_stats': derived_stats,
             'skills': skills,
-            'spells': spell_table,
-            'weapons': weapon_table,
+            'spells': tables['spells'],
+            'weapons': tables['weapons'],
         }
 
         return [character]
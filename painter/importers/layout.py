@@ -0,0 +1,93 @@
+"""
+Declarative layouts for worksheets that contain several tables.
+
+A layout maps region names to their position and shape on the sheet, e.g.
+
+    layout = {
+        'identity': {'start_row': 0, 'height': 2, 'width': 4},
+        'skills': {'start_row': 15, 'width': 7},
+    }
+
+Each region is a table, as understood by `Command.parse_table`: its first row is
+the header row, and `height` includes that header. A height or width of -1 means
+"until the end of the sheet"/"until the first blank header".
+
+`compile_layout` turns a layout into a `LayoutExtractor`, which pulls every region
+out of a sheet in a single pass over its rows.
+"""
+import collections
+
+
+Region = collections.namedtuple('Region', 'start_row start_column height width')
+Region.__new__.__defaults__ = (0, 0, -1, -1)
+
+
+def compile_layout(layout):
+    """
+    Turn a layout into a LayoutExtractor.
+
+    The layout's values can be Regions or dictionaries of Region fields; missing
+    fields take the same defaults as `Command.parse_table`.
+    """
+    regions = collections.OrderedDict()
+    for name, region in layout.items():
+        if not isinstance(region, Region):
+            region = Region(**region)
+        regions[name] = region
+
+    return LayoutExtractor(regions)
+
+
+class LayoutExtractor:
+    """Extract every region of a layout from a worksheet in one pass."""
+    def __init__(self, regions):
+        self.regions = regions
+
+        # The regions whose header row is each row of the sheet.
+        self.headers_by_row = collections.defaultdict(list)
+        for name, region in regions.items():
+            self.headers_by_row[region.start_row].append(name)
+
+        # The first row after the end of every region, if they all have a height.
+        if any(region.height == -1 for region in regions.values()):
+            self.end_row = None
+        else:
+            self.end_row = max(
+                (region.start_row + region.height for region in regions.values()),
+                default=0,
+            )
+
+    def extract(self, worksheet_rows, parse_header_row, parse_data_row):
+        """
+        Return a dictionary of region names to lists of parsed, non-empty rows.
+
+        parse_header_row and parse_data_row have the same signatures as the
+        importer methods of the same name.
+        """
+        tables = {name: [] for name in self.regions}
+        headers = {}
+        open_regions = []
+
+        for i, row in enumerate(worksheet_rows):
+            if self.end_row is not None and i >= self.end_row:
+                break
+
+            # Close any regions that have run out of height.
+            open_regions = [
+                name for name in open_regions
+                if self.regions[name].height == -1
+                or i < self.regions[name].start_row + self.regions[name].height
+            ]
+
+            for name in open_regions:
+                parsed_row = parse_data_row(
+                    row, headers[name], self.regions[name].start_column)
+                if parsed_row is not None:
+                    tables[name].append(parsed_row)
+
+            for name in self.headers_by_row.get(i, ()):
+                region = self.regions[name]
+                headers[name] = parse_header_row(row, region.start_column, region.width)
+                open_regions.append(name)
+
+        return tables
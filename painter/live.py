@@ -0,0 +1,222 @@
+"""
+Push changed cards to open browser tabs as soon as the data files change.
+
+Each open card display holds a Server-Sent Events connection to `CardUpdates`.
+The stream watches the files in IP_DATA_FILES; when they change, one thread
+re-runs the importer and publishes the result to the shared `CardBroadcast`,
+which works out which cards actually changed and wakes every listener.
+
+Streams block while they wait for changes, so this needs a threaded WSGI server
+(such as `runserver`), and each open tab holds one of its threads for as long as
+it's open. It doesn't work under ASGI, which would block the whole server.
+"""
+import collections
+import hashlib
+import importlib
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from .rendering import render_card
+from .repository import get_card_store
+
+
+def get_poll_interval():
+    """How often (in seconds) each stream checks the data files for changes."""
+    return getattr(settings, 'IP_LIVE_POLL_INTERVAL', 0.5)
+
+
+class CardBroadcast:
+    """
+    Remember the rendered HTML of every card, and tell listeners what changed.
+
+    Cards are keyed by their position in the deck, which is how card_display.html
+    labels them. If the shape of the deck changes (cards are added or removed, or a
+    quantity or template changes), the page can't be patched in place, so listeners
+    are asked to reload instead.
+    """
+    # How many events to keep for listeners that fall behind.
+    history_length = 20
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.version = 0
+        self.history = collections.deque(maxlen=self.history_length)
+        self.digests = None
+        self.shape = None
+        # The number of streams currently listening.
+        self.listeners = 0
+
+    def add_listener(self):
+        with self.condition:
+            self.listeners += 1
+
+    def remove_listener(self):
+        with self.condition:
+            self.listeners -= 1
+
+    def forget(self):
+        """
+        Forget the rendered deck, so the next listener renders it afresh.
+
+        Used instead of publishing when nobody is listening, to save rendering the
+        whole deck for nothing.
+        """
+        with self.condition:
+            self.digests = None
+            self.shape = None
+
+    def publish(self, cards):
+        """Render `cards`, and send the ones that changed to every listener."""
+        fragments = {}
+        digests = {}
+        shape = []
+
+        for i, card in enumerate(cards):
+            key = str(i)
+            fragments[key] = render_card(card)
+            digests[key] = hashlib.sha1(fragments[key].encode()).hexdigest()
+            shape.append((card.template_name, card.quantity))
+
+        with self.condition:
+            if self.digests is None:
+                # Nothing to compare against yet; just remember this deck.
+                event = None
+            elif shape != self.shape:
+                event = {'reload': True}
+            else:
+                changed = {
+                    key: fragments[key]
+                    for key, digest in digests.items()
+                    if self.digests[key] != digest
+                }
+                event = {'cards': changed} if changed else None
+
+            self.digests = digests
+            self.shape = shape
+
+            if event is not None:
+                self.version += 1
+                self.history.append((self.version, event))
+                self.condition.notify_all()
+
+    def prime(self):
+        """Make sure there's a rendered deck to compare the next import against."""
+        if self.digests is None:
+            self.publish(get_card_store().all())
+
+    def wait(self, version, timeout):
+        """
+        Wait up to `timeout` seconds for anything newer than `version`.
+
+        Return the latest version and a single event merging everything that
+        happened since `version` (or None if nothing did).
+        """
+        with self.condition:
+            if self.version == version:
+                self.condition.wait(timeout)
+
+            if self.version == version:
+                return version, None
+
+            missed = [event for v, event in self.history if v > version]
+            if len(missed) < self.version - version:
+                # Some events have already fallen out of the history.
+                return self.version, {'reload': True}
+
+            merged = {}
+            for event in missed:
+                if event.get('reload'):
+                    return self.version, {'reload': True}
+                merged.update(event['cards'])
+
+            return self.version, {'cards': merged}
+
+
+class DataFileWatcher:
+    """Re-run the importer whenever any of the data files is modified."""
+    def __init__(self, broadcast):
+        self.broadcast = broadcast
+        self.lock = threading.Lock()
+        self.last_modified = None
+
+    def get_filenames(self):
+        importer = self.get_importer()
+        return [
+            importer.ensure_extension(filename, 'xlsx')
+            for filename in settings.IP_DATA_FILES
+        ]
+
+    def get_importer(self):
+        return importlib.import_module(settings.IP_IMPORTER).Command()
+
+    def get_last_modified(self):
+        try:
+            return max(os.path.getmtime(f) for f in self.get_filenames())
+        except (OSError, ValueError):
+            # A file is missing or mid-save, or there are no files at all.
+            return None
+
+    def mark_current(self):
+        """Record that the stored cards match the data files as they are now."""
+        self.last_modified = self.get_last_modified()
+
+    def refresh(self):
+        """
+        Import and publish the cards if the data files have changed.
+
+        Only one thread imports at a time; any others waiting on the lock will find
+        the files up to date when they get it.
+        """
+        with self.lock:
+            last_modified = self.get_last_modified()
+            if last_modified is None or last_modified == self.last_modified:
+                return
+
+            self.last_modified = last_modified
+
+            # The card store replaces the deck in one go, so nobody else sees the
+            # cards half-imported, even though this runs outside ATOMIC_REQUESTS.
+            self.get_importer().handle(filenames=[], verbosity=0)
+            self.broadcast.publish(get_card_store().all())
+
+
+broadcast = CardBroadcast()
+watcher = DataFileWatcher(broadcast)
+
+
+def stream():
+    """
+    Yield Server-Sent Events describing changes to the deck, forever.
+
+    Each event's data is JSON: either {"cards": {key: html}} or {"reload": true}.
+    """
+    # Send a comment every so often, so closed connections get noticed.
+    keepalive_interval = 15
+
+    broadcast.add_listener()
+    try:
+        broadcast.prime()
+        if watcher.last_modified is None:
+            watcher.mark_current()
+
+        version = broadcast.version
+        last_sent = time.monotonic()
+        yield 'retry: 1000\n\n'
+
+        while True:
+            watcher.refresh()
+            version, event = broadcast.wait(version, get_poll_interval())
+
+            if event is not None:
+                last_sent = time.monotonic()
+                yield 'data: {}\n\n'.format(json.dumps(event))
+            elif time.monotonic() - last_sent > keepalive_interval:
+                last_sent = time.monotonic()
+                yield ': keepalive\n\n'
+    finally:
+        # The client has gone away, and the server has closed the stream.
+        broadcast.remove_listener()
@@ -0,0 +1,5 @@
+from painter.importers.import_cards import Command as ImportCommand
+
+
+class Command(ImportCommand):
+    """Make the importer available as `manage.py import_cards`."""
@@ -0,0 +1,5 @@
+from painter.importers.import_laundry import Command as ImportCommand
+
+
+class Command(ImportCommand):
+    """Make the importer available as `manage.py import_laundry`."""
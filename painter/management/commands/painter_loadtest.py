@@ -0,0 +1,293 @@
+import collections
+import concurrent.futures
+import math
+import os
+import random
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.contrib.staticfiles.handlers import StaticFilesHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.base.creation import TEST_DATABASE_PREFIX
+from django.test import override_settings
+from django.test.testcases import LiveServerThread
+from django.urls import NoReverseMatch, reverse
+from openpyxl import Workbook
+
+from painter import views
+
+
+# The importer that understands the synthetic decks this command writes.
+SYNTHETIC_IMPORTER = 'painter.importers.import_cards'
+
+
+def parse_mix(value):
+    """
+    Parse a request mix like "card_display=1,card_display_noreload=4".
+
+    Return a dictionary of URL names to their relative weights, which can't be
+    negative.
+    """
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        try:
+            weight = int(weight or 1)
+        except ValueError:
+            raise CommandError('Invalid weight in request mix: {}'.format(item))
+
+        if weight < 0:
+            raise CommandError('Negative weight in request mix: {}'.format(item))
+
+        mix[name.strip()] = weight
+
+    if not any(mix.values()):
+        raise CommandError('The request mix must have at least one positive weight.')
+
+    return mix
+
+
+def percentile(sorted_values, percent):
+    """Return the nearest-rank percentile of an already-sorted list."""
+    if not sorted_values:
+        return 0
+    rank = max(math.ceil(percent / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+class Command(BaseCommand):
+    help = ('Start Painter against a throwaway database, fire concurrent requests at' +
+            ' the card display views, and report throughput, latency and errors.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cards',
+            type=int,
+            default=200,
+            help='The number of cards in the synthetic deck.',
+        )
+        parser.add_argument(
+            '--template',
+            default='base',
+            help='The custom template every synthetic card uses.',
+        )
+        parser.add_argument(
+            '--data-file',
+            help=('Load-test with an existing XLSX file and IP_IMPORTER, instead of a' +
+                  ' synthetic deck.'),
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='The total number of requests to make.',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='The number of requests to make at once.',
+        )
+        parser.add_argument(
+            '--mix',
+            type=parse_mix,
+            default='card_display=1,card_display_noreload=4',
+            help=('The relative weights of each URL name in the requests, e.g.' +
+                  ' "card_display=1,card_display_noreload=4".'),
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Seed for shuffling the order of the requests.',
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Keep the load-testing database between runs.',
+        )
+
+    def make_deck(self, directory, size, template):
+        """Write a synthetic deck in the base importer's format, and return its path."""
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['Name', 'Template', 'Quantity', 'Attribute', '*Long Text'])
+
+        for i in range(size):
+            sheet.append([
+                'Card {}'.format(i),
+                template,
+                i % 3 + 1,
+                i * 7 % 100,
+                'First line of card {i}\nSecond line of card {i}'.format(i=i),
+            ])
+
+        filename = os.path.join(directory, 'loadtest.xlsx')
+        workbook.save(filename)
+        return filename
+
+    def make_requests(self, mix, count, seed):
+        """Return a shuffled list of `count` URL names, weighted by `mix`."""
+        rng = random.Random(seed)
+        total_weight = sum(mix.values())
+        shares = {name: count * weight / total_weight for name, weight in mix.items()}
+        counts = {name: int(share) for name, share in shares.items()}
+
+        # Share out the requests left over from rounding down to the names with the
+        # largest remainders. Shuffling first breaks ties fairly.
+        left_over = count - sum(counts.values())
+        candidates = [name for name, weight in mix.items() if weight]
+        rng.shuffle(candidates)
+        candidates.sort(key=lambda name: shares[name] - counts[name], reverse=True)
+        for name in candidates[:left_over]:
+            counts[name] += 1
+
+        names = []
+        for name, name_count in counts.items():
+            names += [name] * name_count
+
+        rng.shuffle(names)
+        return names
+
+    def fetch(self, url):
+        """Request a URL. Return (seconds taken, whether it failed)."""
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url) as response:
+                response.read()
+                failed = response.status >= 400
+        except (urllib.error.URLError, OSError):
+            failed = True
+        return time.perf_counter() - start, failed
+
+    def run_load(self, base_url, names, concurrency):
+        """
+        Fetch every URL name in `names`, `concurrency` at a time.
+
+        Return the wall-clock time taken, and a dictionary of URL names to lists of
+        (seconds, failed) results.
+        """
+        urls = {name: base_url + reverse(name) for name in set(names)}
+        results = collections.defaultdict(list)
+
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = {pool.submit(self.fetch, urls[name]): name for name in names}
+            for future in concurrent.futures.as_completed(futures):
+                results[futures[future]].append(future.result())
+
+        return time.perf_counter() - start, results
+
+    def report(self, elapsed, results):
+        """Print throughput, latency percentiles and errors for each URL name."""
+        line = '{:<24} {:>8} {:>8} {:>9} {:>9} {:>9} {:>9}'
+        self.stdout.write(line.format(
+            'url', 'requests', 'errors', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms'))
+
+        everything = []
+        rows = sorted(results.items())
+        for name, timings in rows:
+            everything += timings
+
+        for name, timings in rows + [('total', everything)]:
+            latencies = sorted(seconds * 1000 for seconds, failed in timings)
+            self.stdout.write(line.format(
+                name,
+                len(timings),
+                sum(failed for seconds, failed in timings),
+                '{:.1f}'.format(len(timings) / elapsed),
+                '{:.1f}'.format(percentile(latencies, 50)),
+                '{:.1f}'.format(percentile(latencies, 95)),
+                '{:.1f}'.format(percentile(latencies, 99)),
+            ))
+
+    def handle(self, *args, **options):
+        if not options['data_file'] and settings.IP_IMPORTER != SYNTHETIC_IMPORTER:
+            raise CommandError(
+                'Synthetic decks need IP_IMPORTER = {!r}. Use --data-file to load-test'
+                ' another importer with your own deck.'.format(SYNTHETIC_IMPORTER))
+
+        for name in options['mix']:
+            try:
+                reverse(name)
+            except NoReverseMatch:
+                raise CommandError('Unknown URL name in request mix: {}'.format(name))
+
+        names = self.make_requests(options['mix'], options['requests'], options['seed'])
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = options['data_file'] or self.make_deck(
+                directory, options['cards'], options['template'])
+
+            with override_settings(IP_DATA_FILES=[filename]):
+                elapsed, results = self.run_with_server(
+                    names, options['concurrency'], options['keepdb'])
+
+        self.report(elapsed, results)
+
+    def get_database_name(self, connection):
+        """
+        Return the name of the load-testing database.
+
+        This is kept apart from the test runner's database, so that dropping it
+        doesn't wipe out a database kept with `manage.py test --keepdb`. SQLite test
+        databases are in memory by default, so they can't clash and are left alone.
+        """
+        test_name = connection.settings_dict['TEST'].get('NAME')
+        if connection.vendor == 'sqlite' and not test_name:
+            return None
+
+        if not test_name:
+            test_name = TEST_DATABASE_PREFIX + connection.settings_dict['NAME']
+        return test_name + '_loadtest'
+
+    def run_with_server(self, names, concurrency, keepdb):
+        """Create the database, start a threaded server, and run the load test."""
+        connection = connections['default']
+        old_name = connection.settings_dict['NAME']
+        test_settings = connection.settings_dict['TEST']
+        old_test_name = test_settings.get('NAME')
+
+        test_settings['NAME'] = self.get_database_name(connection)
+        try:
+            connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, keepdb=keepdb)
+            try:
+                return self.run_with_database(connection, names, concurrency)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        finally:
+            test_settings['NAME'] = old_test_name
+
+    def run_with_database(self, connection, names, concurrency):
+        """Start a threaded server against the database, and run the load test."""
+        # In-memory SQLite databases only exist on this thread's connection,
+        # so the server has to share it (as LiveServerTestCase does).
+        connections_override = {}
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            connection.inc_thread_sharing()
+            connections_override['default'] = connection
+
+        server = LiveServerThread('localhost', StaticFilesHandler, connections_override)
+        server.daemon = True
+
+        try:
+            # Import once up front, so the no-reload view has cards from the start.
+            views.ip_importer.Command().handle(verbosity=0)
+
+            server.start()
+            server.is_ready.wait()
+            if server.error:
+                raise server.error
+
+            base_url = 'http://{}:{}'.format(server.host, server.port)
+            return self.run_load(base_url, names, concurrency)
+        finally:
+            server.terminate()
+            server.join()
+            if connections_override:
+                connection.dec_thread_sharing()
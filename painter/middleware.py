@@ -0,0 +1,96 @@
+"""
+Compress responses with brotli (if it's installed) or gzip.
+
+Add 'painter.middleware.CompressionMiddleware' near the top of MIDDLEWARE, in
+place of Django's GZipMiddleware. Streaming responses are compressed as they
+stream, except for Server-Sent Events, which would otherwise be held up in the
+compressor's buffer.
+"""
+import re
+
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+ACCEPTS_BROTLI = re.compile(r'\bbr\b')
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+# Compressing anything smaller than this isn't worth it.
+MINIMUM_LENGTH = 200
+
+# Content types that must reach the client as soon as they're sent.
+UNBUFFERED_CONTENT_TYPES = ('text/event-stream',)
+
+
+def compress_sequence_brotli(sequence):
+    """Brotli-compress an iterable of bytes, flushing after each item."""
+    compressor = brotli.Compressor()
+    for item in sequence:
+        yield compressor.process(item) + compressor.flush()
+    yield compressor.finish()
+
+
+def get_encoding(request):
+    """Return the best encoding the client accepts, or None."""
+    accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if brotli is not None and ACCEPTS_BROTLI.search(accept_encoding):
+        return 'br'
+    if ACCEPTS_GZIP.search(accept_encoding):
+        return 'gzip'
+    return None
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if content_type in UNBUFFERED_CONTENT_TYPES:
+            return response
+
+        if not response.streaming and len(response.content) < MINIMUM_LENGTH:
+            return response
+
+        # Whether or not we compress this one, it depends on Accept-Encoding.
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = get_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if encoding == 'br':
+                content = compress_sequence_brotli(response.streaming_content)
+            else:
+                content = compress_sequence(response.streaming_content)
+            response.streaming_content = content
+            # The compressed length isn't known until it's all been sent.
+            del response['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed = brotli.compress(response.content)
+            else:
+                compressed = compress_string(response.content)
+
+            # Don't bother if it didn't get any smaller.
+            if len(compressed) >= len(response.content):
+                return response
+
+            response.content = compressed
+            response['Content-Length'] = str(len(response.content))
+
+        # A compressed response is a different entity, so a strong ETag no longer
+        # holds. Weaken it, as Django's GZipMiddleware does.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+
+        response['Content-Encoding'] = encoding
+        return response
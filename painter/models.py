@@ -3,6 +3,21 @@ from django.db import models
 from jsonfield import JSONField
 
 
+def get_template_path(template_name):
+    """
+    Translate a template_name into a path to a template in the custom/ directory.
+    """
+    template = template_name
+
+    if not template.endswith(".html"):
+        template += ".html"
+
+    if not template.startswith("custom/"):
+        template = "custom/" + template
+
+    return template
+
+
 class Card(models.Model):
     """A single card entry."""
     name = models.CharField(max_length=255)
@@ -17,15 +32,7 @@ class Card(models.Model):
         """
         Translate the stored template_name into a path to a template in the custom/ directory.
         """
-        template = self.template_name
-
-        if not template.endswith(".html"):
-            template += ".html"
-
-        if not template.startswith("custom/"):
-            template = "custom/" + template
-
-        return template
+        return get_template_path(self.template_name)
 
     class Meta:
         ordering = ['pk']
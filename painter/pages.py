@@ -0,0 +1,92 @@
+"""
+Lay out cards into printed pages and rows.
+
+card_display.html just iterates over the result of `plan_pages`, so all the
+bookkeeping about when to start a new row or page happens here, once, in Python.
+"""
+from django.conf import settings
+
+
+# The widest span layout.less has styles for.
+MAX_SPAN = 6
+
+
+class Cell:
+    """One copy of a card, placed on a page."""
+    def __init__(self, card, index, span):
+        self.card = card
+        # The position of the card in the deck, shared by all of its copies.
+        self.index = index
+        # The number of grid columns the card takes up.
+        self.span = span
+        # The card's rendered HTML, filled in by rendering.render_chunk.
+        self.html = ''
+
+
+class Row:
+    """A row of cells on a page."""
+    def __init__(self, columns):
+        self.cells = []
+        self.free = columns
+
+    def add(self, cell):
+        self.cells.append(cell)
+        self.free -= cell.span
+
+
+def get_grid():
+    """Return the (columns, rows) of cards on each printed page."""
+    return (
+        getattr(settings, 'IP_PAGE_COLUMNS', 3),
+        getattr(settings, 'IP_PAGE_ROWS', 3),
+    )
+
+
+def get_template_spans():
+    """
+    Return a dictionary of template names to the number of columns they span.
+
+    Templates that aren't listed take up a single column. Spans are capped at
+    MAX_SPAN, and at the number of columns on the page.
+    """
+    return getattr(settings, 'IP_TEMPLATE_SPANS', {})
+
+
+def plan_pages(cards, columns=None, rows=None, spans=None):
+    """
+    Group every copy of every card into a list of pages, each a list of Rows.
+
+    Cards are placed in order, except that a card too wide for the current row is
+    allowed to leave a gap that a later, narrower card can fill ("first fit"),
+    so pages of mixed card sizes are packed without gaps. Only rows on the page
+    currently being filled are considered, so cards never move between pages.
+    """
+    default_columns, default_rows = get_grid()
+    columns = columns or default_columns
+    rows = rows or default_rows
+    if spans is None:
+        spans = get_template_spans()
+
+    pages = []
+    page = []
+
+    for index, card in enumerate(cards):
+        span = min(spans.get(card.template_name, 1), columns, MAX_SPAN)
+
+        for i in range(card.quantity):
+            row = next((r for r in page if r.free >= span), None)
+
+            if row is None:
+                if len(page) == rows:
+                    pages.append(page)
+                    page = []
+
+                row = Row(columns)
+                page.append(row)
+
+            row.add(Cell(card, index, span))
+
+    if page:
+        pages.append(page)
+
+    return pages
@@ -0,0 +1,125 @@
+"""
+Profile imports and renders on demand.
+
+Profiles are saved as pstats dumps in IP_PROFILE_DIR (the system's temporary
+directory by default), and summarised as the hottest functions in each of a
+few groups, so it's easy to see whether a slow deck is spending its time in
+Painter itself, in openpyxl, or rendering templates.
+"""
+import cProfile
+import os
+import pstats
+import re
+import tempfile
+import time
+
+from django.conf import settings
+import django.template
+import openpyxl
+
+
+# The columns a summary can be sorted by.
+SORT_KEYS = ('calls', 'tottime', 'cumtime')
+
+# Functions are grouped by the directory their code lives in, checked in order.
+# Time spent in custom templates shows up in Django's template engine.
+GROUPS = (
+    ('painter', os.path.dirname(os.path.abspath(__file__))),
+    ('openpyxl', os.path.dirname(os.path.abspath(openpyxl.__file__))),
+    ('templates', os.path.dirname(os.path.abspath(django.template.__file__))),
+)
+OTHER_GROUP = 'other'
+
+# Saved profiles have names like painter-display-20190501-120000-123456.pstats.
+PROFILE_NAME = re.compile(r'^painter-[\w-]+\.pstats$')
+
+
+def get_profile_dir():
+    return getattr(settings, 'IP_PROFILE_DIR', tempfile.gettempdir())
+
+
+def profile_call(func, *args, **kwargs):
+    """Call func(*args, **kwargs) under cProfile. Return (result, profiler)."""
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args, **kwargs)
+    return result, profiler
+
+
+def save_profile(profiler, label):
+    """Dump a profiler's stats to the profile directory, and return the file name."""
+    name = 'painter-{}-{}-{:06d}.pstats'.format(
+        label,
+        time.strftime('%Y%m%d-%H%M%S'),
+        int(time.time() % 1 * 1000000),
+    )
+    profiler.dump_stats(os.path.join(get_profile_dir(), name))
+    return name
+
+
+def load_profile(name):
+    """
+    Load a saved profile by the name save_profile returned.
+
+    Raise ValueError for anything that isn't a saved profile's name, so this
+    can't be used to read arbitrary files.
+    """
+    if not PROFILE_NAME.match(name):
+        raise ValueError('Not a profile name: {}'.format(name))
+    return pstats.Stats(os.path.join(get_profile_dir(), name))
+
+
+def get_group(filename):
+    filename = os.path.abspath(filename)
+    for group, directory in GROUPS:
+        if filename.startswith(directory + os.sep):
+            return group
+    return OTHER_GROUP
+
+
+def summarise(stats, sort='cumtime', limit=20):
+    """
+    Return the `limit` hottest functions in each group, sorted by `sort`.
+
+    `stats` can be a profiler or a pstats.Stats. The result is a list of
+    (group, rows) pairs, where each row is a dictionary describing one function.
+    """
+    if not isinstance(stats, pstats.Stats):
+        stats = pstats.Stats(stats)
+
+    if sort not in SORT_KEYS:
+        sort = 'cumtime'
+
+    groups = {group: [] for group, directory in GROUPS}
+    groups[OTHER_GROUP] = []
+
+    for (filename, lineno, function), values in stats.stats.items():
+        primitive_calls, calls, tottime, cumtime, callers = values
+        groups[get_group(filename)].append({
+            'function': function,
+            'location': '{}:{}'.format(filename, lineno),
+            'calls': calls,
+            'tottime': tottime,
+            'cumtime': cumtime,
+        })
+
+    summary = []
+    for group, rows in groups.items():
+        rows.sort(key=lambda row: row[sort], reverse=True)
+        summary.append((group, rows[:limit]))
+
+    return summary
+
+
+def format_summary(summary):
+    """Format a summary as plain text, for the console."""
+    lines = []
+    for group, rows in summary:
+        lines.append('')
+        lines.append('== {} =='.format(group))
+        lines.append('{:>9} {:>9} {:>9}  function'.format(*SORT_KEYS))
+        for row in rows:
+            lines.append(
+                '{calls:>9} {tottime:>9.4f} {cumtime:>9.4f}  {function} ({location})'
+                .format(**row)
+            )
+    return '\n'.join(lines)
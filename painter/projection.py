@@ -0,0 +1,168 @@
+"""
+Work out which card data each custom template actually uses.
+
+Custom templates see a card's data as `c`, and usually only read a few of its
+fields. `FieldProjector` finds those fields by walking each compiled template
+(including any templates it extends or includes), so the importer can store
+only what will be displayed.
+
+If a template uses `c` as a whole - for instance `{{ c|lookup:key }}`,
+`{% for key in c %}` or `{% for key, value in c.items %}` - every field is
+kept, unless IP_TEMPLATE_FIELDS lists the fields that template needs.
+"""
+from django.conf import settings
+from django.template import loader, TemplateDoesNotExist
+from django.template.base import FilterExpression, Node, Template, Variable
+from django.template.loader_tags import ExtendsNode, IncludeNode
+from django.template.smartif import TokenBase
+
+from .models import get_template_path
+
+
+# The name card data has in custom templates.
+CARD_DATA = 'c'
+
+# Lookups on CARD_DATA that Django resolves as dictionary methods rather than
+# fields (when there's no field of that name), such as {% for k, v in c.items %}.
+DICT_METHODS = {'items', 'keys', 'values', 'get'}
+
+
+class UsesEverything(Exception):
+    """Raised when a template's fields can't be narrowed down."""
+
+
+class FieldFinder:
+    """Collect the fields of CARD_DATA used by a template and everything it includes."""
+    def __init__(self):
+        self.fields = set()
+        self.visited = set()
+
+    def visit_template_name(self, expression):
+        """Follow an {% extends %} or {% include %} to the template it names."""
+        # Template names given as string literals are compiled into the
+        # FilterExpression as a plain string; anything else is worked out at render
+        # time, so there's no telling which template it'll be.
+        if not isinstance(expression.var, str) or expression.filters:
+            raise UsesEverything
+
+        name = str(expression.var)
+        if name in self.visited:
+            return
+        self.visited.add(name)
+
+        try:
+            template = loader.get_template(name)
+        except TemplateDoesNotExist:
+            raise UsesEverything
+
+        self.visit_template(template)
+
+    def visit_template(self, template):
+        # Unwrap the template backend's wrapper, if there is one.
+        template = getattr(template, 'template', template)
+        if not isinstance(template, Template):
+            raise UsesEverything
+
+        self.visit(template.nodelist)
+
+    def visit_variable(self, variable):
+        if not isinstance(variable, Variable) or not variable.lookups:
+            return
+
+        if variable.lookups[0] != CARD_DATA:
+            return
+
+        if len(variable.lookups) == 1 or variable.lookups[1] in DICT_METHODS:
+            raise UsesEverything
+
+        self.fields.add(variable.lookups[1])
+
+    def visit(self, value):
+        if isinstance(value, FilterExpression):
+            self.visit_variable(value.var)
+            for function, arguments in value.filters:
+                for is_variable, argument in arguments:
+                    if is_variable:
+                        self.visit_variable(argument)
+
+        elif isinstance(value, (list, tuple)):
+            # NodeLists, and the (condition, nodelist) pairs in {% if %}.
+            for item in value:
+                self.visit(item)
+
+        elif isinstance(value, dict):
+            for item in value.values():
+                self.visit(item)
+
+        elif isinstance(value, (Node, TokenBase)):
+            if isinstance(value, ExtendsNode):
+                self.visit_template_name(value.parent_name)
+            elif isinstance(value, IncludeNode):
+                self.visit_template_name(value.template)
+
+            for name, attribute in vars(value).items():
+                if name not in ('token', 'origin'):
+                    self.visit(attribute)
+
+
+def find_fields(template):
+    """
+    Return the set of fields of CARD_DATA that a template uses.
+
+    Return None if it might use any of them.
+    """
+    finder = FieldFinder()
+    try:
+        finder.visit_template(template)
+    except UsesEverything:
+        return None
+    return finder.fields
+
+
+def get_field_overrides():
+    """
+    Return IP_TEMPLATE_FIELDS, with its keys turned into full template paths.
+
+    IP_TEMPLATE_FIELDS maps template names (as they'd appear in the Template
+    column) to the fields those templates need.
+    """
+    overrides = getattr(settings, 'IP_TEMPLATE_FIELDS', {})
+    return {
+        get_template_path(name): set(fields)
+        for name, fields in overrides.items()
+    }
+
+
+class FieldProjector:
+    """
+    Trim cards' data down to the fields their templates use.
+
+    Each template is analysed once, the first time a card needs it. Make a new
+    projector for each import, so changes to the templates are picked up.
+    """
+    def __init__(self):
+        self.fields = get_field_overrides()
+
+    def get_fields(self, template_path):
+        """Return the fields a template uses, or None for all of them."""
+        if template_path not in self.fields:
+            try:
+                template = loader.get_template(template_path)
+            except TemplateDoesNotExist:
+                # Leave it alone, so the error shows up when the card is displayed.
+                self.fields[template_path] = None
+            else:
+                self.fields[template_path] = find_fields(template)
+
+        return self.fields[template_path]
+
+    def project(self, card):
+        """Replace a card's data with only the fields its template uses."""
+        fields = self.get_fields(card.get_template())
+        if fields is not None:
+            card.data = {
+                key: value
+                for key, value in card.data.items()
+                if key in fields
+            }
+        return card
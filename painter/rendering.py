@@ -0,0 +1,139 @@
+"""
+Render decks of cards to HTML.
+
+Each card is rendered once, however many copies of it there are. With
+IP_MINIFY_HTML on, the whitespace between the tags in each card is collapsed as
+it's rendered, so the deck's output isn't full of template indentation repeated
+for every copy.
+
+When IP_RENDER_WORKERS is more than 1, the planned pages are split into
+page-aligned chunks, each chunk is rendered with painter/card_pages.html in a
+pool of worker processes (each with its own copy of Django), and the results are
+joined back together in order.
+
+`render_pages` can be used by anything that needs a deck's HTML - the card display
+uses it, and so can static or PDF exports.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import math
+import multiprocessing
+import re
+import threading
+
+import django
+from django.conf import settings
+from django.db import connections
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+
+PAGES_TEMPLATE = 'painter/card_pages.html'
+
+# Whitespace is significant inside these tags, so leave any HTML using them alone.
+PREFORMATTED = re.compile(r'<(pre|textarea|script)\b', re.IGNORECASE)
+# Runs of whitespace between one tag and the next.
+WHITESPACE_BETWEEN_TAGS = re.compile(r'>(\s{2,})<')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_count():
+    """The number of processes to render with. 1 or less renders in this process."""
+    return getattr(settings, 'IP_RENDER_WORKERS', 1)
+
+
+def setup_worker():
+    django.setup()
+    # Workers only render templates; they have no business with the database.
+    connections.close_all()
+
+
+def get_pool(workers):
+    """Return the shared pool of rendering processes, starting it if necessary."""
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            # Spawn rather than fork, since forking a threaded server is unsafe.
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=setup_worker,
+            )
+        return _pool
+
+
+def split_pages(pages, workers):
+    """
+    Split pages into chunks to be rendered separately.
+
+    Aim for a few chunks per worker, so one slow chunk doesn't hold everything up.
+    """
+    chunk_size = getattr(settings, 'IP_RENDER_CHUNK_PAGES', None)
+    if not chunk_size:
+        chunk_size = max(math.ceil(len(pages) / (workers * 4)), 1)
+
+    return [pages[i:i + chunk_size] for i in range(0, len(pages), chunk_size)]
+
+
+def minify_enabled():
+    return getattr(settings, 'IP_MINIFY_HTML', False)
+
+
+def collapse_whitespace(match):
+    return '>\n<' if '\n' in match.group(1) else '> <'
+
+
+def minify(html):
+    """
+    Collapse runs of whitespace between tags into a single newline or space.
+
+    Text, attribute values and anything containing <pre>, <textarea> or <script>
+    are left alone. This keeps a whitespace character between every pair of tags,
+    so normal text flow looks the same. It can still change content styled with
+    `white-space: pre`, `pre-wrap` or `pre-line`, which is why it's opt-in.
+    """
+    if PREFORMATTED.search(html):
+        return html.strip()
+    return WHITESPACE_BETWEEN_TAGS.sub(collapse_whitespace, html).strip()
+
+
+def render_card(card):
+    """Render the contents of a single card, minified if IP_MINIFY_HTML is on."""
+    html = render_to_string(card.get_template(), {'c': card.data, 'name': card.name})
+    if minify_enabled():
+        return minify(html)
+    return html.strip()
+
+
+def render_chunk(pages):
+    """
+    Render some planned pages with PAGES_TEMPLATE.
+
+    Each card is rendered once, and its HTML is shared by all of its copies.
+    """
+    fragments = {}
+    for page in pages:
+        for row in page:
+            for cell in row.cells:
+                if cell.index not in fragments:
+                    fragments[cell.index] = mark_safe(render_card(cell.card))
+                cell.html = fragments[cell.index]
+
+    return render_to_string(PAGES_TEMPLATE, {'pages': pages}).strip()
+
+
+def render_pages(pages):
+    """Render a list of planned pages (see pages.plan_pages) to HTML."""
+    workers = get_worker_count()
+    if workers <= 1:
+        return mark_safe(render_chunk(pages))
+
+    chunks = split_pages(pages, workers)
+    if len(chunks) <= 1:
+        html = render_chunk(pages)
+    else:
+        html = ''.join(get_pool(workers).map(render_chunk, chunks))
+
+    return mark_safe(html)
@@ -0,0 +1,152 @@
+"""
+Where imported cards are kept until they're displayed.
+
+The importer hands its cards to a card store, and the display views read them
+back from the same store. IP_CARD_STORE chooses which one, as an import path:
+
+ * painter.repository.DatabaseCardStore (the default) keeps cards in the
+   database, so every process and user sees the same deck.
+ * painter.repository.MemoryCardStore keeps cards in this process's memory,
+   which skips the database entirely. It suits single-user design sessions,
+   but each server process has its own deck, and importing from the command
+   line won't affect a running server.
+"""
+import collections
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import TextField
+from django.db.models.functions import Cast
+from django.utils.module_loading import import_string
+
+from .models import Card, get_template_path
+
+# Decode card data with the fastest JSON library available.
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    try:
+        from ujson import loads as json_loads
+    except ImportError:
+        json_loads = json.loads
+
+
+class DisplayCard(collections.namedtuple(
+    'DisplayCard', 'name template_name quantity data template'
+)):
+    """A read-only card, with everything needed to display it worked out in advance."""
+    __slots__ = ()
+
+    @classmethod
+    def from_card(cls, card):
+        return cls(
+            name=card.name,
+            template_name=card.template_name,
+            # Quantities come out of the importer as strings.
+            quantity=int(card.quantity or 1),
+            data=card.data,
+            template=card.get_template(),
+        )
+
+    def get_template(self):
+        return self.template
+
+
+class CardStore:
+    """The interface every card store provides."""
+    def replace(self, chunks):
+        """
+        Replace every stored card with the ones in `chunks`, an iterable of lists
+        of unsaved Cards. Return the number of cards stored.
+        """
+        raise NotImplementedError
+
+    def all(self):
+        """Return an iterable of every stored card, in order."""
+        raise NotImplementedError
+
+
+class DatabaseCardStore(CardStore):
+    """Keep cards in the database, as Card objects."""
+    # The number of rows fetched from the database at once when displaying cards.
+    # Can be overridden with the IP_DISPLAY_CHUNK_SIZE setting.
+    chunk_size = 2000
+
+    def replace(self, chunks):
+        # The cards are written a chunk at a time, so make sure nobody sees the deck
+        # half-written, and that a failed import leaves the old deck in place.
+        with transaction.atomic():
+            Card.objects.all().delete()
+
+            total = 0
+            for chunk in chunks:
+                # Use bulk_create to store them for an easy performance bump.
+                Card.objects.bulk_create(chunk)
+                total += len(chunk)
+
+        return total
+
+    def all(self):
+        """
+        Yield every card as a DisplayCard, fetching rows in chunks.
+
+        Only the columns needed for display are fetched, and the data is fetched as
+        raw JSON and decoded here rather than by the model field. A card with
+        several templates is stored as neighbouring rows with identical data, so
+        only the previous row's data is remembered; that's enough to decode it once,
+        without holding on to every row.
+        """
+        chunk_size = getattr(settings, 'IP_DISPLAY_CHUNK_SIZE', self.chunk_size)
+        rows = (
+            Card.objects
+            .annotate(raw_data=Cast('data', TextField()))
+            .values_list('name', 'template_name', 'quantity', 'raw_data')
+            .iterator(chunk_size=chunk_size)
+        )
+
+        previous_raw_data = data = None
+        for name, template_name, quantity, raw_data in rows:
+            if raw_data != previous_raw_data:
+                previous_raw_data = raw_data
+                data = json_loads(raw_data)
+
+            yield DisplayCard(
+                name=name,
+                template_name=template_name,
+                quantity=quantity,
+                data=data,
+                template=get_template_path(template_name),
+            )
+
+
+class MemoryCardStore(CardStore):
+    """Keep cards in memory, as an immutable tuple of DisplayCards."""
+    def __init__(self):
+        self.cards = ()
+
+    def replace(self, chunks):
+        cards = tuple(
+            DisplayCard.from_card(card)
+            for chunk in chunks
+            for card in chunk
+        )
+
+        # Replacing the reference is atomic, so readers see either the whole of
+        # the old deck or the whole of the new one.
+        self.cards = cards
+        return len(cards)
+
+    def all(self):
+        return self.cards
+
+
+_card_stores = {}
+
+
+def get_card_store():
+    """Return the card store named by IP_CARD_STORE, creating it if necessary."""
+    path = getattr(settings, 'IP_CARD_STORE', 'painter.repository.DatabaseCardStore')
+    if path not in _card_stores:
+        _card_stores[path] = import_string(path)()
+    return _card_stores[path]
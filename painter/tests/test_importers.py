@@ -0,0 +1,120 @@
+import collections
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+
+from django.test import SimpleTestCase
+from openpyxl import Workbook
+
+from ..importers.import_cards import Command
+
+
+Cell = collections.namedtuple('Cell', 'value')
+
+
+class Worksheet:
+    """An openpyxl-like worksheet, whose rows can only be read once."""
+    def __init__(self, title, rows):
+        self.title = title
+        self.rows = rows
+
+    def iter_rows(self):
+        return iter(self.rows)
+
+
+def generate_rows(*rows):
+    """Yield rows of openpyxl-like cells one at a time, as read-only worksheets do."""
+    for row in rows:
+        yield tuple(Cell(value) for value in row)
+
+
+class TestConvertToPython(SimpleTestCase):
+    def setUp(self):
+        self.command = Command()
+
+    def test_rows_generator(self):
+        """Rows are parsed as they're read, without needing the whole sheet."""
+        rows = generate_rows(
+            ['Name', 'Template', '*Long Text'],
+            ['Leeroy', 'base', 'At least\nI have chicken'],
+            [None, None, None],
+            # Read-only rows can stop at their last non-empty cell.
+            ['Jenkins', 'base'],
+        )
+        entries = self.command.convert_to_python(Worksheet('Sheet 1', rows))
+
+        self.assertEqual(next(entries), {
+            'name': 'Leeroy',
+            'template': 'base',
+            'long_text': ['At least', 'I have chicken'],
+        })
+        self.assertEqual(list(entries), [
+            {'name': 'Jenkins', 'template': 'base', 'long_text': None},
+        ])
+
+    def test_empty_sheet(self):
+        worksheet = Worksheet('Sheet 2', generate_rows())
+        self.assertEqual(list(self.command.convert_to_python(worksheet)), [])
+
+
+class TestLoadAllWorksheets(SimpleTestCase):
+    def setUp(self):
+        self.command = Command()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def save_workbook(self, rows, dimension=None):
+        """
+        Save rows of values to an XLSX file, and return its name.
+
+        If `dimension` is given, the sheet claims to be that size, whatever size it
+        really is, as some programs that write XLSX files get it wrong.
+        """
+        workbook = Workbook()
+        for row in rows:
+            workbook.active.append(row)
+
+        filename = os.path.join(self.directory, 'cards.xlsx')
+        workbook.save(filename)
+
+        if dimension is not None:
+            rewritten = os.path.join(self.directory, 'rewritten.xlsx')
+            with zipfile.ZipFile(filename) as source, \
+                    zipfile.ZipFile(rewritten, 'w') as destination:
+                for item in source.infolist():
+                    content = source.read(item.filename)
+                    if item.filename == 'xl/worksheets/sheet1.xml':
+                        content = re.sub(
+                            rb'<dimension ref="[^"]*"',
+                            b'<dimension ref="' + dimension.encode() + b'"',
+                            content,
+                        )
+                    destination.writestr(item, content)
+            os.replace(rewritten, filename)
+
+        return filename
+
+    def load_entries(self, filename):
+        return [
+            entry
+            for sheet in self.command.load_all_worksheets([filename])
+            for entry in self.command.convert_to_python(sheet)
+        ]
+
+    def test_wrong_dimension(self):
+        """Sheets that claim to be smaller than they are are still read in full."""
+        rows = [
+            ['Name', 'Template', 'Cost'],
+            ['Leeroy', 'base', 5],
+            ['Jenkins', 'base', None],
+        ]
+        expected = [
+            {'name': 'Leeroy', 'template': 'base', 'cost': '5'},
+            {'name': 'Jenkins', 'template': 'base', 'cost': None},
+        ]
+
+        filename = self.save_workbook(rows, dimension='A1')
+
+        self.assertEqual(self.load_entries(filename), expected)
@@ -0,0 +1,85 @@
+import collections
+
+from django.test import override_settings, SimpleTestCase
+
+from ..importers.import_cards import Command
+from ..importers.import_laundry import Command as LaundryCommand
+from ..importers.layout import compile_layout, Region
+
+
+Cell = collections.namedtuple('Cell', 'value')
+
+
+def make_rows(*rows):
+    """Turn lists of values into rows of openpyxl-like cells."""
+    return [[Cell(value) for value in row] for row in rows]
+
+
+class TestLayoutExtractor(SimpleTestCase):
+    def setUp(self):
+        self.command = Command()
+        self.rows = make_rows(
+            ['Name', 'Cost', None, 'Stat', 'Value'],
+            ['Leeroy', 5, None, 'Speed', 3],
+            [None, None, None, 'Luck', 1],
+            ['Jenkins', 2, None, None, None],
+        )
+
+    def extract(self, layout):
+        extractor = compile_layout(layout)
+        return extractor.extract(
+            self.rows, self.command.parse_header_row, self.command.parse_data_row)
+
+    def test_regions(self):
+        """Each region is parsed as its own table."""
+        tables = self.extract({
+            'cards': {'height': 2, 'width': 2},
+            'stats': {'start_column': 3},
+        })
+
+        self.assertEqual(tables, {
+            'cards': [{'name': 'Leeroy', 'cost': '5'}],
+            'stats': [
+                {'stat': 'Speed', 'value': '3'},
+                {'stat': 'Luck', 'value': '1'},
+            ],
+        })
+
+    def test_matches_parse_table(self):
+        """Regions are parsed the same way as parse_table would."""
+        region = Region(start_row=0, start_column=0, height=-1, width=2)
+        tables = self.extract({'cards': region})
+
+        expected = self.command.parse_table(self.rows, *region)
+        self.assertEqual(tables['cards'], expected)
+
+    def test_end_row(self):
+        """The extractor knows where the last region ends."""
+        extractor = compile_layout({
+            'a': {'height': 2},
+            'b': {'start_row': 1, 'height': 3},
+        })
+        self.assertEqual(extractor.end_row, 4)
+
+    def test_end_row_unbounded(self):
+        extractor = compile_layout({'a': {'height': 2}, 'b': {'start_row': 1}})
+        self.assertIsNone(extractor.end_row)
+
+
+class TestImporterLayout(SimpleTestCase):
+    layout = {'cards': {'width': 2}}
+
+    @override_settings(IP_SHEET_LAYOUT=layout)
+    def test_setting(self):
+        """Importers without a layout of their own use IP_SHEET_LAYOUT."""
+        extractor = Command().get_layout_extractor()
+        self.assertEqual(list(extractor.regions), ['cards'])
+
+    @override_settings(IP_SHEET_LAYOUT=layout)
+    def test_own_layout(self):
+        """An importer's own layout takes precedence over IP_SHEET_LAYOUT."""
+        extractor = LaundryCommand().get_layout_extractor()
+        self.assertEqual(list(extractor.regions), list(LaundryCommand.layout))
+
+    def test_no_layout(self):
+        self.assertFalse(Command().get_layout_extractor())
@@ -0,0 +1,77 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from . import factories
+from .. import live
+
+
+class TestCardBroadcast(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(live, 'render_card', self.render_card)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.broadcast = live.CardBroadcast()
+        self.cards = factories.CardFactory.build_batch(2)
+        self.broadcast.publish(self.cards)
+
+    def render_card(self, card):
+        return '<p>{}</p>'.format(card.name)
+
+    def test_first_publish(self):
+        """The first deck is only remembered, since there's nothing to compare it to."""
+        self.assertEqual(self.broadcast.wait(0, timeout=0), (0, None))
+
+    def test_changed_cards(self):
+        """Only the cards whose HTML changed are sent."""
+        self.cards[1].name = 'Leeroy Jenkins'
+        self.broadcast.publish(self.cards)
+
+        version, event = self.broadcast.wait(0, timeout=0)
+        self.assertEqual(version, 1)
+        self.assertEqual(event, {'cards': {'1': '<p>Leeroy Jenkins</p>'}})
+
+    def test_unchanged_cards(self):
+        self.broadcast.publish(self.cards)
+        self.assertEqual(self.broadcast.wait(0, timeout=0), (0, None))
+
+    def test_changed_shape(self):
+        """Adding a card can't be patched in place, so listeners are told to reload."""
+        self.broadcast.publish(self.cards + factories.CardFactory.build_batch(1))
+
+        version, event = self.broadcast.wait(0, timeout=0)
+        self.assertEqual(event, {'reload': True})
+
+    def test_merged_events(self):
+        """A listener that missed several events gets all their changes at once."""
+        self.cards[0].name = 'Leeroy'
+        self.broadcast.publish(self.cards)
+        self.cards[1].name = 'Jenkins'
+        self.broadcast.publish(self.cards)
+
+        version, event = self.broadcast.wait(0, timeout=0)
+        self.assertEqual(version, 2)
+        self.assertEqual(event, {'cards': {'0': '<p>Leeroy</p>', '1': '<p>Jenkins</p>'}})
+
+    def test_forget(self):
+        """Once forgotten, the next deck is only remembered, not compared."""
+        self.broadcast.forget()
+        self.broadcast.publish(factories.CardFactory.build_batch(3))
+
+        self.assertEqual(self.broadcast.wait(0, timeout=0), (0, None))
+
+
+class TestStream(TestCase):
+    def test_listeners(self):
+        """Streams count as listeners until they're closed."""
+        broadcast = live.CardBroadcast()
+        with mock.patch.object(live, 'broadcast', broadcast), \
+                mock.patch.object(broadcast, 'prime'), \
+                mock.patch.object(live.watcher, 'mark_current'):
+            stream = live.stream()
+            next(stream)
+            self.assertEqual(broadcast.listeners, 1)
+
+            stream.close()
+            self.assertEqual(broadcast.listeners, 0)
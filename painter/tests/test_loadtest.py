@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from ..management.commands.painter_loadtest import Command, parse_mix, percentile
+
+
+class TestParseMix(SimpleTestCase):
+    def test_weights(self):
+        mix = parse_mix('card_display=1, card_display_noreload=4')
+        self.assertEqual(mix, {'card_display': 1, 'card_display_noreload': 4})
+
+    def test_default_weight(self):
+        self.assertEqual(parse_mix('card_display'), {'card_display': 1})
+
+    def test_invalid_weight(self):
+        with self.assertRaises(CommandError):
+            parse_mix('card_display=lots')
+
+    def test_negative_weight(self):
+        with self.assertRaises(CommandError):
+            parse_mix('card_display=2,card_display_noreload=-1')
+
+    def test_no_weight(self):
+        with self.assertRaises(CommandError):
+            parse_mix('card_display=0')
+
+
+class TestLoadTest(SimpleTestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 50), 0)
+
+    def test_percentile_odd(self):
+        """The 50th percentile of an odd number of values is the median."""
+        self.assertEqual(percentile([1, 2, 3, 4, 5], 50), 3)
+        self.assertEqual(percentile(list(range(1, 26)), 50), 13)
+        self.assertEqual(percentile(list(range(1, 26)), 95), 24)
+
+    def test_make_requests(self):
+        """Requests are split between URL names by weight."""
+        names = Command().make_requests({'a': 1, 'b': 3}, 8, seed=0)
+        self.assertEqual(sorted(names), ['a', 'a', 'b', 'b', 'b', 'b', 'b', 'b'])
+
+    def test_make_requests_remainder(self):
+        """Requests left over from rounding are shared out, not all given to one URL."""
+        seen = set()
+        for seed in range(20):
+            names = Command().make_requests({'a': 1, 'b': 1, 'c': 1}, 2, seed=seed)
+            self.assertEqual(len(names), 2)
+            self.assertEqual(len(set(names)), 2)
+            seen.update(names)
+
+        self.assertEqual(seen, {'a', 'b', 'c'})
+
+    def test_make_requests_count(self):
+        names = Command().make_requests({'a': 1, 'b': 2}, 7, seed=0)
+        self.assertEqual(sorted(names), ['a', 'a', 'b', 'b', 'b', 'b', 'b'])
+
+    def test_unknown_url_name(self):
+        with self.assertRaises(CommandError):
+            call_command('painter_loadtest', mix=parse_mix('card_display,nope'))
+
+    def test_database_name(self):
+        """The load test never uses the test runner's database."""
+        connection = mock.Mock(
+            vendor='postgresql',
+            settings_dict={'NAME': 'painter', 'TEST': {'NAME': None}},
+        )
+        self.assertEqual(Command().get_database_name(connection), 'test_painter_loadtest')
+
+    def test_database_name_in_memory(self):
+        connection = mock.Mock(vendor='sqlite', settings_dict={'NAME': 'x', 'TEST': {}})
+        self.assertIsNone(Command().get_database_name(connection))
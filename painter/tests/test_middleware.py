@@ -0,0 +1,66 @@
+import gzip
+from unittest import mock
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from .. import middleware
+
+
+class TestCompressionMiddleware(SimpleTestCase):
+    content = b'<div class="card-cell"></div>' * 100
+
+    def setUp(self):
+        self.middleware = middleware.CompressionMiddleware()
+
+    def process(self, response, accept_encoding='gzip, deflate'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return self.middleware.process_response(request, response)
+
+    def test_gzip(self):
+        response = self.process(HttpResponse(self.content))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content), self.content)
+
+    def test_not_accepted(self):
+        response = self.process(HttpResponse(self.content), accept_encoding='')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, self.content)
+
+    def test_short(self):
+        response = self.process(HttpResponse(b'Leeroy Jenkins'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming(self):
+        """Streaming responses are compressed as they stream."""
+        response = StreamingHttpResponse(iter([self.content, self.content]))
+        response = self.process(response)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response)), self.content * 2)
+
+    def test_event_stream(self):
+        """Server-Sent Events aren't compressed, since that would buffer them."""
+        response = StreamingHttpResponse(
+            iter([self.content]), content_type='text/event-stream')
+        response = self.process(response)
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_brotli(self):
+        """Brotli is preferred when it's installed and accepted."""
+        fake_brotli = mock.Mock(compress=mock.Mock(return_value=b'tiny'))
+        with mock.patch.object(middleware, 'brotli', fake_brotli):
+            response = self.process(
+                HttpResponse(self.content), accept_encoding='gzip, br')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response.content, b'tiny')
+
+    def test_brotli_not_installed(self):
+        with mock.patch.object(middleware, 'brotli', None):
+            response = self.process(HttpResponse(self.content), accept_encoding='br')
+        self.assertFalse(response.has_header('Content-Encoding'))
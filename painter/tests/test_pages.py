@@ -0,0 +1,62 @@
+from django.test import SimpleTestCase
+
+from . import factories
+from ..pages import MAX_SPAN, plan_pages
+
+
+class TestPlanPages(SimpleTestCase):
+    def layout(self, pages):
+        """Summarise a plan as lists of card names, for easy comparison."""
+        return [
+            [[cell.card.name for cell in row.cells] for row in page]
+            for page in pages
+        ]
+
+    def test_grid(self):
+        """Copies of cards fill rows, then pages, in order."""
+        cards = [
+            factories.CardFactory.build(name='A', quantity=3),
+            factories.CardFactory.build(name='B', quantity=2),
+        ]
+        pages = plan_pages(cards, columns=2, rows=2, spans={})
+
+        self.assertEqual(self.layout(pages), [
+            [['A', 'A'], ['A', 'B']],
+            [['B']],
+        ])
+
+    def test_index(self):
+        """Every copy of a card knows the card's position in the deck."""
+        cards = factories.CardFactory.build_batch(2, quantity=2)
+        pages = plan_pages(cards, columns=3, rows=3, spans={})
+
+        indexes = [cell.index for row in pages[0] for cell in row.cells]
+        self.assertEqual(indexes, [0, 0, 1, 1])
+
+    def test_spans(self):
+        """Narrow cards fill the gaps left by wide ones."""
+        cards = [
+            factories.CardFactory.build(name='A', template_name='small'),
+            factories.CardFactory.build(name='B', template_name='wide'),
+            factories.CardFactory.build(name='C', template_name='small'),
+        ]
+        pages = plan_pages(cards, columns=2, rows=3, spans={'wide': 2})
+
+        self.assertEqual(self.layout(pages), [[['A', 'C'], ['B']]])
+
+    def test_span_too_wide(self):
+        """Cards never span more than the whole row."""
+        cards = [factories.CardFactory.build(template_name='huge')]
+        pages = plan_pages(cards, columns=3, rows=3, spans={'huge': 5})
+
+        self.assertEqual(pages[0][0].cells[0].span, 3)
+
+    def test_span_max(self):
+        """Cards never span more columns than layout.less has styles for."""
+        cards = [factories.CardFactory.build(template_name='huge')]
+        pages = plan_pages(cards, columns=10, rows=3, spans={'huge': 8})
+
+        self.assertEqual(pages[0][0].cells[0].span, MAX_SPAN)
+
+    def test_empty(self):
+        self.assertEqual(plan_pages([], columns=3, rows=3, spans={}), [])
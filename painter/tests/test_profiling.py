@@ -0,0 +1,112 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+import django.template
+from django.test import override_settings, SimpleTestCase, TestCase
+import openpyxl
+
+from .. import models, pages, profiling
+
+
+class ProfileDirMixin:
+    """Save profiles to a temporary directory for the duration of each test."""
+    def setUp(self):
+        super().setUp()
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir)
+
+        profile_dir = override_settings(IP_PROFILE_DIR=self.profile_dir)
+        profile_dir.enable()
+        self.addCleanup(profile_dir.disable)
+
+
+class TestGetGroup(SimpleTestCase):
+    def test_painter(self):
+        self.assertEqual(profiling.get_group(pages.__file__), 'painter')
+
+    def test_openpyxl(self):
+        self.assertEqual(profiling.get_group(openpyxl.__file__), 'openpyxl')
+
+    def test_templates(self):
+        """Time spent in Django's template engine counts as rendering templates."""
+        self.assertEqual(profiling.get_group(django.template.__file__), 'templates')
+
+    def test_other(self):
+        self.assertEqual(profiling.get_group(os.__file__), 'other')
+
+    def test_prefix(self):
+        """Directories that merely start with the same name aren't included."""
+        directory = os.path.dirname(os.path.abspath(pages.__file__))
+        self.assertEqual(profiling.get_group(directory + '-extra/pages.py'), 'other')
+
+
+class TestSummarise(SimpleTestCase):
+    def setUp(self):
+        result, self.profiler = profiling.profile_call(pages.plan_pages, [], 3, 3, {})
+
+    def test_groups(self):
+        """Functions are summarised under the group their code lives in."""
+        summary = dict(profiling.summarise(self.profiler))
+
+        self.assertEqual(
+            list(summary), ['painter', 'openpyxl', 'templates', 'other'])
+        functions = [row['function'] for row in summary['painter']]
+        self.assertIn('plan_pages', functions)
+
+    def test_sort(self):
+        summary = profiling.summarise(self.profiler, sort='calls')
+
+        for group, rows in summary:
+            calls = [row['calls'] for row in rows]
+            self.assertEqual(calls, sorted(calls, reverse=True))
+
+    def test_limit(self):
+        for group, rows in profiling.summarise(self.profiler, limit=1):
+            self.assertLessEqual(len(rows), 1)
+
+    def test_format_summary(self):
+        text = profiling.format_summary(profiling.summarise(self.profiler))
+        self.assertIn('== painter ==', text)
+        self.assertIn('plan_pages', text)
+
+
+class TestLoadProfile(ProfileDirMixin, SimpleTestCase):
+    def test_round_trip(self):
+        """Saved profiles can be loaded by the name they were saved as."""
+        result, profiler = profiling.profile_call(pages.plan_pages, [], 3, 3, {})
+        name = profiling.save_profile(profiler, 'display')
+
+        stats = profiling.load_profile(name)
+
+        functions = [function for filename, line, function in stats.stats]
+        self.assertIn('plan_pages', functions)
+
+    def test_not_a_profile(self):
+        """Only the names of saved profiles can be loaded, not arbitrary files."""
+        for name in ('../etc/passwd', '/etc/passwd', 'painter-../../x.pstats'):
+            with self.subTest(name=name), self.assertRaises(ValueError):
+                profiling.load_profile(name)
+
+    def test_missing(self):
+        with self.assertRaises(OSError):
+            profiling.load_profile('painter-display-missing.pstats')
+
+
+class TestImportProfile(ProfileDirMixin, TestCase):
+    def test_profile(self):
+        """import_cards --profile imports the cards, and saves and prints a profile."""
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            call_command('import_cards', profile=True, verbosity=0)
+
+        self.assertTrue(models.Card.objects.exists())
+
+        saved = os.listdir(self.profile_dir)
+        self.assertEqual(len(saved), 1)
+        self.assertRegex(saved[0], profiling.PROFILE_NAME)
+        self.assertIn('== openpyxl ==', output.getvalue())
+        self.assertIn(saved[0], output.getvalue())
@@ -0,0 +1,81 @@
+from django.template import Template
+from django.test import override_settings, SimpleTestCase
+
+from . import factories
+from ..projection import FieldProjector, find_fields
+
+
+class TestFindFields(SimpleTestCase):
+    def assertFields(self, source, expected):
+        self.assertEqual(find_fields(Template(source)), expected)
+
+    def test_variables(self):
+        self.assertFields('<h1>{{ name }}</h1><p>{{ c.rules }} {{ c.cost.value }}</p>', {
+            'rules',
+            'cost',
+        })
+
+    def test_tags(self):
+        """Fields used in tags and filter arguments are found too."""
+        source = '''
+            {% load index %}
+            {% if c.flavour and not c.hidden %}
+                {% for stat in c.stats %}{{ stat|lookup:c.key }}{% endfor %}
+            {% endif %}
+            {% with spell=c.spells|index:0 %}{{ spell }}{% endwith %}
+        '''
+        self.assertFields(source, {'flavour', 'hidden', 'stats', 'key', 'spells'})
+
+    def test_whole(self):
+        """Using the data as a whole means any field might be used."""
+        self.assertFields('{% load index %}{{ c|lookup:"rules" }}', None)
+
+    def test_dict_methods(self):
+        """Dictionary methods like c.items use every field."""
+        self.assertFields('{% for key, value in c.items %}{{ value }}{% endfor %}', None)
+        self.assertFields('{% for key in c.keys %}{{ key }}{% endfor %}', None)
+
+    def test_extends(self):
+        """Fields used by a parent template are found."""
+        self.assertFields('{% extends "custom/base.html" %}', {'attribute', 'long_text'})
+
+    def test_dynamic_include(self):
+        self.assertFields('{% include template_name %}', None)
+
+
+class TestFieldProjector(SimpleTestCase):
+    def test_project(self):
+        card = factories.CardFactory.build(
+            template_name='alternate',
+            data={'attribute': 1, 'long_text': ['Leeroy'], 'skills': ['Jenkins']},
+        )
+        FieldProjector().project(card)
+
+        self.assertEqual(card.data, {'attribute': 1, 'long_text': ['Leeroy']})
+
+    def test_project_dict_methods(self):
+        """Cards whose templates loop over c.items keep all their data."""
+        card = factories.CardFactory.build(data={'attribute': 1, 'skills': ['Jenkins']})
+        projector = FieldProjector()
+        projector.fields[card.get_template()] = find_fields(
+            Template('{% for key, value in c.items %}{{ value }}{% endfor %}'))
+        projector.project(card)
+
+        self.assertEqual(card.data, {'attribute': 1, 'skills': ['Jenkins']})
+
+    def test_missing_template(self):
+        """Cards whose templates don't exist are left alone."""
+        card = factories.CardFactory.build(template_name='missing', data={'a': 1})
+        FieldProjector().project(card)
+
+        self.assertEqual(card.data, {'a': 1})
+
+    @override_settings(IP_TEMPLATE_FIELDS={'base': ['skills']})
+    def test_override(self):
+        card = factories.CardFactory.build(
+            template_name='base',
+            data={'attribute': 1, 'skills': ['Jenkins']},
+        )
+        FieldProjector().project(card)
+
+        self.assertEqual(card.data, {'skills': ['Jenkins']})
@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.test import override_settings, SimpleTestCase
+from django.utils.html import strip_spaces_between_tags
+
+from . import factories
+from .. import rendering
+from ..pages import plan_pages
+
+
+class TestRendering(SimpleTestCase):
+    def setUp(self):
+        cards = factories.CardFactory.build_batch(10, template_name='base')
+        self.pages = plan_pages(cards, columns=2, rows=1, spans={})
+
+    def test_split_pages(self):
+        """Pages are split into a few chunks per worker."""
+        chunks = rendering.split_pages(self.pages, workers=2)
+        self.assertEqual([len(chunk) for chunk in chunks], [1] * 5)
+
+    @override_settings(IP_RENDER_CHUNK_PAGES=2)
+    def test_split_pages_setting(self):
+        chunks = rendering.split_pages(self.pages, workers=2)
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+
+    def test_render_pages(self):
+        html = rendering.render_pages(self.pages)
+        self.assertEqual(html.count('class="spoiler"'), 5)
+        self.assertIn('Card', html)
+
+    def test_render_pages_in_parallel(self):
+        """Rendering in worker processes gives the same cards, in the same order."""
+        expected = rendering.render_pages(self.pages)
+        with override_settings(IP_RENDER_WORKERS=2):
+            html = rendering.render_pages(self.pages)
+
+        # Only the whitespace between chunks may differ.
+        self.assertEqual(
+            strip_spaces_between_tags(html),
+            strip_spaces_between_tags(expected),
+        )
+
+
+class TestMinify(SimpleTestCase):
+    def test_minify(self):
+        """Runs of whitespace between tags become a single newline or space."""
+        html = '\n    <h1>Leeroy</h1>\n\n    <p>At least I have chicken.</p>  <b>!</b>\n'
+        self.assertEqual(
+            rendering.minify(html),
+            '<h1>Leeroy</h1>\n<p>At least I have chicken.</p> <b>!</b>',
+        )
+
+    def test_minify_text(self):
+        """Whitespace in text and attribute values is left alone."""
+        html = '<p class="a  b">Leeroy\n\n    Jenkins</p>'
+        self.assertEqual(rendering.minify(html), html)
+
+    def test_minify_preformatted(self):
+        html = '<pre>\n    Leeroy\n        Jenkins</pre>'
+        self.assertEqual(rendering.minify(html), html)
+
+    def test_render_card(self):
+        """Card HTML is only minified when IP_MINIFY_HTML is on."""
+        card = factories.CardFactory.build(template_name='base')
+        self.assertIn('</h1>\n\n', rendering.render_card(card))
+
+        with override_settings(IP_MINIFY_HTML=True):
+            self.assertNotIn('</h1>\n\n', rendering.render_card(card))
+
+    def test_render_chunk_once_per_card(self):
+        """Each card is rendered once, however many copies of it there are."""
+        cards = factories.CardFactory.build_batch(2, template_name='base', quantity=3)
+        pages = plan_pages(cards, columns=3, rows=3, spans={})
+
+        with mock.patch.object(rendering, 'render_card', return_value='') as render_card:
+            rendering.render_chunk(pages)
+
+        self.assertEqual(render_card.call_count, 2)
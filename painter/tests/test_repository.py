@@ -0,0 +1,100 @@
+from django.test import override_settings, TestCase
+
+from . import factories
+from .. import models, repository
+
+
+class TestDatabaseCardStore(TestCase):
+    def setUp(self):
+        self.store = repository.DatabaseCardStore()
+
+    def test_replace(self):
+        """Replacing the cards clears out the old ones and saves the new ones."""
+        factories.CardFactory.create(name='Old')
+        chunks = [
+            factories.CardFactory.build_batch(2),
+            factories.CardFactory.build_batch(1),
+        ]
+
+        total = self.store.replace(chunks)
+
+        self.assertEqual(total, 3)
+        self.assertEqual(models.Card.objects.count(), 3)
+        self.assertFalse(models.Card.objects.filter(name='Old').exists())
+
+    def test_replace_error(self):
+        """If a later chunk can't be made, the old cards are left in place."""
+        factories.CardFactory.create(name='Old')
+
+        def chunks():
+            yield factories.CardFactory.build_batch(2)
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            self.store.replace(chunks())
+
+        self.assertEqual(
+            list(models.Card.objects.values_list('name', flat=True)), ['Old'])
+
+    def test_all(self):
+        """Cards are read back as DisplayCards, with their data decoded."""
+        card = factories.CardFactory.create(template_name='base', quantity=2)
+
+        self.assertEqual(list(self.store.all()), [
+            repository.DisplayCard(
+                name=card.name,
+                template_name='base',
+                quantity=2,
+                data={'item': 42},
+                template='custom/base.html',
+            ),
+        ])
+
+    def test_all_decodes_once(self):
+        """Cards with identical data share a single decoded copy of it."""
+        factories.CardFactory.create_batch(2, data={'skills': ['Leeroy']})
+
+        first, second = self.store.all()
+        self.assertIs(first.data, second.data)
+
+
+class TestMemoryCardStore(TestCase):
+    def setUp(self):
+        self.store = repository.MemoryCardStore()
+
+    def test_replace(self):
+        """Cards are kept in memory as DisplayCards, without touching the database."""
+        card = factories.CardFactory.build(
+            name='Leeroy', template_name='base', quantity='2')
+
+        total = self.store.replace([[card]])
+
+        self.assertEqual(total, 1)
+        self.assertEqual(models.Card.objects.count(), 0)
+        self.assertEqual(self.store.all(), (
+            repository.DisplayCard(
+                name='Leeroy',
+                template_name='base',
+                quantity=2,
+                data=card.data,
+                template='custom/base.html',
+            ),
+        ))
+
+    def test_replace_again(self):
+        self.store.replace([factories.CardFactory.build_batch(2)])
+        self.store.replace([factories.CardFactory.build_batch(1)])
+        self.assertEqual(len(self.store.all()), 1)
+
+
+class TestGetCardStore(TestCase):
+    def test_default(self):
+        store = repository.get_card_store()
+        self.assertIsInstance(store, repository.DatabaseCardStore)
+
+    @override_settings(IP_CARD_STORE='painter.repository.MemoryCardStore')
+    def test_memory(self):
+        """The same store is used every time, so cards stay in memory between requests."""
+        store = repository.get_card_store()
+        self.assertIsInstance(store, repository.MemoryCardStore)
+        self.assertIs(repository.get_card_store(), store)
@@ -17,3 +17,18 @@ class TestPainterURLs(URLTestCase):
             expected_url='/noreload',
             url_name='card_display_noreload',
         )
+
+    def test_card_updates(self):
+        self.assert_url_matches_view(
+            view=views.CardUpdates,
+            expected_url='/updates',
+            url_name='card_updates',
+        )
+
+    def test_profile_summary(self):
+        self.assert_url_matches_view(
+            view=views.ProfileSummary,
+            expected_url='/profile/painter-display.pstats',
+            url_name='profile_summary',
+            url_kwargs={'name': 'painter-display.pstats'},
+        )
@@ -1,16 +1,23 @@
+import os
 from unittest import mock
 
+from django.http import Http404
+from django.test import override_settings
+
 from . import factories
+from .test_profiling import ProfileDirMixin
 from .utils import RequestTestCase
-from .. import views
-from ..management.commands.import_cards import Command
+from .. import pages, profiling, views
+from ..importers.import_cards import Command
 
 
-class TestCardDisplay(RequestTestCase):
+class TestCardDisplay(ProfileDirMixin, RequestTestCase):
     view = views.CardDisplay
 
     def setUp(self):
-        factories.CardFactory.create()
+        super().setUp()
+        # Use a template that exists in test_app, so the cards can be rendered.
+        factories.CardFactory.create(template_name='base')
         self.request = self.create_request()
         self.view = self.get_view()
 
@@ -18,6 +25,76 @@ class TestCardDisplay(RequestTestCase):
         response = self.view(self.request)
         self.assertEqual(response.status_code, 200)
 
+    @override_settings(DEBUG=True)
+    def test_get_profile(self):
+        """?profile=1 returns a summary of the profile instead of the cards."""
+        request = self.create_request(data={'profile': '1'}, user=self.request.user)
+        response = self.view(request)
+
+        self.assertEqual(response.status_code, 200)
+        name, = os.listdir(self.profile_dir)
+        self.assertIn(name.encode(), response.content)
+        self.assertIn(b'plan_pages', response.content)
+
+    @override_settings(DEBUG=False)
+    def test_get_profile_not_staff(self):
+        """Profiling is ignored for non-staff users outside of DEBUG mode."""
+        request = self.create_request(data={'profile': '1'}, user=self.request.user)
+        with mock.patch.object(profiling, 'save_profile') as save_profile:
+            response = self.view(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(save_profile.called)
+
+
+class TestProfileSummary(ProfileDirMixin, RequestTestCase):
+    view = views.ProfileSummary
+
+    def setUp(self):
+        super().setUp()
+        result, profiler = profiling.profile_call(pages.plan_pages, [], 3, 3, {})
+        self.name = profiling.save_profile(profiler, 'display')
+        self.view = self.get_view()
+
+    @override_settings(DEBUG=True)
+    def test_get(self):
+        request = self.create_request()
+        response = self.view(request, name=self.name)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'plan_pages', response.content)
+        self.assertIn('cumtime &#9660;'.encode(), response.content)
+
+    @override_settings(DEBUG=True)
+    def test_get_sort(self):
+        request = self.create_request(data={'sort': 'calls'})
+        response = self.view(request, name=self.name)
+
+        self.assertIn('calls &#9660;'.encode(), response.content)
+        self.assertNotIn('cumtime &#9660;'.encode(), response.content)
+
+    @override_settings(DEBUG=False)
+    def test_get_staff(self):
+        """Staff can see profiles outside of DEBUG mode."""
+        request = self.create_request(user=factories.UserFactory.build(is_staff=True))
+        response = self.view(request, name=self.name)
+
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(DEBUG=False)
+    def test_get_not_staff(self):
+        """Profiles are hidden from non-staff users outside of DEBUG mode."""
+        request = self.create_request()
+        with self.assertRaises(Http404):
+            self.view(request, name=self.name)
+
+    @override_settings(DEBUG=True)
+    def test_get_not_a_profile(self):
+        request = self.create_request()
+        for name in ('../etc/passwd', 'painter-display-missing.pstats'):
+            with self.subTest(name=name), self.assertRaises(Http404):
+                self.view(request, name=name)
+
 
 class TestCardDisplayReload(RequestTestCase):
     view = views.CardDisplayReload
@@ -32,3 +109,22 @@ class TestCardDisplayReload(RequestTestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(call_command.call_count, 1)
+
+
+class TestCardUpdates(RequestTestCase):
+    view = views.CardUpdates
+
+    def setUp(self):
+        self.request = self.create_request()
+        self.view = self.get_view()
+
+    @override_settings(IP_LIVE_UPDATES=False)
+    def test_get_disabled(self):
+        with self.assertRaises(Http404):
+            self.view(self.request)
+
+    @override_settings(IP_LIVE_UPDATES=True)
+    def test_get(self):
+        response = self.view(self.request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
@@ -5,5 +5,11 @@ from . import views
 
 urlpatterns = [
     url(r'^noreload$', views.CardDisplay.as_view(), name='card_display_noreload'),
+    url(
+        r'^profile/(?P<name>[\w.-]+)$',
+        views.ProfileSummary.as_view(),
+        name='profile_summary',
+    ),
+    url(r'^updates$', views.CardUpdates.as_view(), name='card_updates'),
     url(r'^$', views.CardDisplayReload.as_view(), name='card_display'),
 ]
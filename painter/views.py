@@ -1,9 +1,13 @@
 import importlib
 
 from django.conf import settings
-from django.views.generic import ListView
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import render
+from django.views.generic import ListView, View
 
-from . import models
+from . import live, models, profiling, rendering
+from .pages import plan_pages
+from .repository import get_card_store
 
 # settings.IP_IMPORTER needs to point to a management command.
 # There are two default ones:
@@ -11,13 +15,110 @@ from . import models
 #  * painter.importers.import_laundry
 ip_importer = importlib.import_module(settings.IP_IMPORTER)
 
-class CardDisplay(ListView):
+
+def live_updates_enabled():
+    return getattr(settings, 'IP_LIVE_UPDATES', False)
+
+
+def can_profile(request):
+    """Profiling is only available in DEBUG mode, or to staff."""
+    user = getattr(request, 'user', None)
+    return settings.DEBUG or (user is not None and user.is_staff)
+
+
+def render_profile(request, stats, name):
+    sort = request.GET.get('sort')
+    if sort not in profiling.SORT_KEYS:
+        sort = 'cumtime'
+
+    context = {
+        'name': name,
+        'sort': sort,
+        'sort_keys': profiling.SORT_KEYS,
+        'summary': profiling.summarise(stats, sort=sort),
+    }
+    return render(request, 'painter/profile.html', context)
+
+
+class ProfileMixin:
+    """
+    Profile the whole request when ?profile=1 is passed.
+
+    This covers any import as well as rendering the page. Instead of the page,
+    return a summary of the hottest functions.
+    """
+    def dispatch(self, request, *args, **kwargs):
+        if request.GET.get('profile') != '1' or not can_profile(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        response, profiler = profiling.profile_call(
+            self.dispatch_and_render, request, *args, **kwargs)
+        name = profiling.save_profile(profiler, 'display')
+        return render_profile(request, profiler, name)
+
+    def dispatch_and_render(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        # TemplateResponses are rendered lazily, so force that to happen here.
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+
+class CardDisplay(ProfileMixin, ListView):
     model = models.Card
     template_name = 'painter/card_display.html'
 
+    def get_queryset(self):
+        return get_card_store().all()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['pages'] = plan_pages(context['object_list'])
+        context['deck_html'] = rendering.render_pages(context['pages'])
+        context['live_updates'] = live_updates_enabled()
+        return context
+
 
 class CardDisplayReload(CardDisplay):
     def get(self, request, *args, **kwargs):
         importer = ip_importer.Command()
         importer.handle(filenames=[], verbosity=1)
+
+        # Let any other open tabs know about the new cards. Publishing renders
+        # the whole deck, so only do that if someone is listening.
+        if live_updates_enabled():
+            live.watcher.mark_current()
+            if live.broadcast.listeners:
+                live.broadcast.publish(get_card_store().all())
+            else:
+                live.broadcast.forget()
+
         return super().get(request, *args, **kwargs)
+
+
+class CardUpdates(View):
+    """A Server-Sent Events stream of changes to the cards."""
+    def get(self, request, *args, **kwargs):
+        if not live_updates_enabled():
+            raise Http404('Live updates are turned off.')
+
+        response = StreamingHttpResponse(live.stream(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx and friends from buffering the stream.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class ProfileSummary(View):
+    """Show a saved profile, sorted by ?sort=calls, tottime or cumtime."""
+    def get(self, request, *args, **kwargs):
+        if not can_profile(request):
+            raise Http404('Profiling is turned off.')
+
+        name = kwargs['name']
+        try:
+            stats = profiling.load_profile(name)
+        except (ValueError, OSError):
+            raise Http404('No such profile.')
+
+        return render_profile(request, stats, name)